@@ -23,12 +23,12 @@ if str(project_root) not in sys.path:
 try:
     # Try importing from src directory (when src is in path)
     from agents.Agent import Agent, AgentConfig
-    from llm import DoubaoService
+    from llm import get_doubao_service
 except ImportError:
     # Fallback: import from project root (when project root is in path)
     try:
         from src.agents.Agent import Agent, AgentConfig
-        from src.llm import DoubaoService
+        from src.llm import get_doubao_service
     except ImportError as e:
         logger.error(f"Failed to import Agent or DoubaoService. Project root: {project_root}, src_path: {src_path}, sys.path: {sys.path[:3]}")
         raise ImportError(f"Could not import Agent or DoubaoService: {e}") from e
@@ -45,7 +45,7 @@ class AgentService:
     def _try_initialize(self):
         """Try to initialize the LLM service, storing any errors."""
         try:
-            self.llm_service = DoubaoService()
+            self.llm_service = get_doubao_service()
             logger.info("Initialized DoubaoService for Agent")
         except ValueError as e:
             # Missing environment variables
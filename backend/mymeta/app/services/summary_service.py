@@ -12,10 +12,10 @@ if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
 try:
-    from llm import DoubaoService
+    from llm import get_doubao_service
 except ImportError:
     try:
-        from src.llm import DoubaoService
+        from src.llm import get_doubao_service
     except ImportError:
         raise ImportError("Could not import DoubaoService")
 
@@ -27,7 +27,7 @@ class SummaryService:
     def __init__(self):
         """Initialize the summary service with LLM."""
         try:
-            self.llm_service = DoubaoService()
+            self.llm_service = get_doubao_service()
             logger.info("Initialized DoubaoService for Summary")
         except Exception as e:
             logger.error(f"Failed to initialize DoubaoService: {e}")
@@ -65,10 +65,17 @@ class SummaryService:
 
 总结："""
             
-            # Use the LLM service to generate summary
+            # Use the LLM service to generate summary; cap generation since the
+            # result is truncated to max_length characters anyway, but never
+            # above the configured ARK_MAX_OUTPUT_TOKENS
+            max_output_tokens = max_length * 2
+            configured_limit = self.llm_service.config.max_output_tokens
+            if configured_limit is not None:
+                max_output_tokens = min(max_output_tokens, configured_limit)
             response = self.llm_service.chat(
                 [{"role": "user", "content": prompt}],
-                temperature=0.3
+                temperature=0.3,
+                max_output_tokens=max_output_tokens,
             )
             
             summary = response.get("message", "无法生成总结")
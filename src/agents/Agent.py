@@ -14,16 +14,38 @@ from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, Tool
 
 try:
     from ..llm.chat_model import DoubaoChatModel
-    from ..llm.client import DoubaoService, DoubaoServiceError
+    from ..llm.client import DoubaoService, DoubaoServiceError, get_doubao_service
 except ImportError:
     from llm.chat_model import DoubaoChatModel
-    from llm.client import DoubaoService, DoubaoServiceError
+    from llm.client import DoubaoService, DoubaoServiceError, get_doubao_service
 try:
     from tools import LocalMCPTool, ToolContext, ToolExecutionError
 except ImportError:
     from ..tools import LocalMCPTool, ToolContext, ToolExecutionError
 logger = logging.getLogger(__name__)
 
+_GREETING_PREFIX_RE = re.compile(r"^(?:你好|您好|在吗|hi|hello|hey)[,，\s]*", re.IGNORECASE)
+_POLITE_PREFIX_RE = re.compile(r"^(?:请问|想了解一下)[,，\s]*", re.IGNORECASE)
+_NEWLINES_RE = re.compile(r"[\r\n]+")
+_TRAILING_PUNCT_RE = re.compile(r"[？?。.!]+$")
+_COMPACT_STRIP_RE = re.compile(r"[，,：:\s]")
+_ENGLISH_IDENTITY_RE = re.compile(
+    r"who are you\??"
+    r"|what model (?:are you|do you use)\??"
+    r"|what ai (?:are you)?\??"
+    r"|which model (?:are you|do you use)\??"
+)
+_CHINESE_IDENTITY_QUERIES = frozenset({
+    "你是谁", "你是谁呀", "你是谁呢",
+    "你是哪个模型", "你是什么模型", "你是什么ai", "你是什么",
+    "您是谁", "您是什么模型", "请介绍你自己",
+})
+_ENGLISH_IDENTITY_QUERIES = frozenset({
+    "whoareyou", "whatareyou", "whatmodelareyou",
+    "whatmodeldoyouuse", "whatareyoumodel", "whatai", "whatareyouai",
+    "whichmodelareyou",
+})
+
 
 @dataclass
 class AgentConfig:
@@ -109,7 +131,7 @@ class Agent:
     def llm_service(self) -> DoubaoService:
         if self._llm_service is None:
             try:
-                self._llm_service = DoubaoService()
+                self._llm_service = get_doubao_service()
             except Exception as exc:
                 raise RuntimeError(f"Failed to initialize DoubaoService: {exc}") from exc
         return self._llm_service
@@ -275,9 +297,10 @@ class Agent:
                     
                     # Get current time and context info
                     current_time = datetime.now()
+                    timestamp = current_time.isoformat()
                     context_info = {
-                        "current_time": current_time.isoformat(),
-                        "current_time_readable": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+                        "current_time": timestamp,
+                        "current_time_readable": current_time.isoformat(sep=" ", timespec="seconds"),
                         "working_dir": self.config.working_dir,
                     }
                     
@@ -285,7 +308,7 @@ class Agent:
                         thought=ai_message.content or "模型选择调用工具",
                         action=tool_name,
                         action_input=tool_args if isinstance(tool_args, dict) else {"text": str(tool_args)},
-                        timestamp=current_time.isoformat(),
+                        timestamp=timestamp,
                         context_info=context_info,
                     )
 
@@ -443,12 +466,12 @@ class Agent:
             return False
 
         # Remove common greetings or polite prefixes
-        text = re.sub(r"^(?:你好|您好|在吗|hi|hello|hey)[,，\s]*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"^(?:请问|想了解一下)[,，\s]*", "", text, flags=re.IGNORECASE)
+        text = _GREETING_PREFIX_RE.sub("", text)
+        text = _POLITE_PREFIX_RE.sub("", text)
 
         # Normalize whitespace and trailing punctuation
-        text = re.sub(r"[\r\n]+", " ", text)
-        text = re.sub(r"[？?。.!]+$", "", text).strip()
+        text = _NEWLINES_RE.sub(" ", text)
+        text = _TRAILING_PUNCT_RE.sub("", text).strip()
         if not text:
             return False
 
@@ -456,34 +479,12 @@ class Agent:
         if any(sep in text for sep in ["；", ";", "\n"]):
             return False
 
-        compact = re.sub(r"[，,：:\s]", "", text).lower()
+        compact = _COMPACT_STRIP_RE.sub("", text).lower()
         if not compact:
             return False
 
-        chinese_exact = {
-            "你是谁", "你是谁呀", "你是谁呢",
-            "你是哪个模型", "你是什么模型", "你是什么ai", "你是什么",
-            "您是谁", "您是什么模型", "请介绍你自己",
-        }
-        english_exact = {
-            "whoareyou", "whatareyou", "whatmodelareyou",
-            "whatmodeldoyouuse", "whatareyoumodel", "whatai", "whatareyouai",
-            "whichmodelareyou",
-        }
-
-        if compact in chinese_exact or compact in english_exact:
+        if compact in _CHINESE_IDENTITY_QUERIES or compact in _ENGLISH_IDENTITY_QUERIES:
             return True
 
-        english_text = text.lower()
-        english_patterns = [
-            r"^who are you\??$",
-            r"^what model (?:are you|do you use)\??$",
-            r"^what ai (?:are you)?\??$",
-            r"^which model (?:are you|do you use)\??$",
-        ]
-        for pattern in english_patterns:
-            if re.fullmatch(pattern, english_text):
-                return True
-
-        return False
+        return _ENGLISH_IDENTITY_RE.fullmatch(text.lower()) is not None
 
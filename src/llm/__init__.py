@@ -1,5 +1,5 @@
-from .client import DoubaoConfig, DoubaoService, DoubaoServiceError
+from .client import DoubaoConfig, DoubaoService, DoubaoServiceError, get_doubao_service
 
-__all__ = ["DoubaoConfig", "DoubaoService", "DoubaoServiceError"]
+__all__ = ["DoubaoConfig", "DoubaoService", "DoubaoServiceError", "get_doubao_service"]
 
 
@@ -65,10 +65,6 @@ class DoubaoChatModel(BaseChatModel):
     ) -> ChatResult:
         payload = [self._convert_message(m) for m in messages]
 
-        extra_body = {}
-        if stop:
-            extra_body["stop_sequences"] = stop
-
         # Convert tools to API format if bound_tools is set
         tools = None
         if self.bound_tools:
@@ -79,7 +75,7 @@ class DoubaoChatModel(BaseChatModel):
                 payload,
                 temperature=self.temperature,
                 tools=tools,
-                extra_body=extra_body or None,
+                stop=stop,
             )
         except DoubaoServiceError:
             raise
@@ -17,6 +17,7 @@ Environment variables (place in `.env` and load with `dotenv` if desired):
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import logging
 import os
@@ -164,6 +165,7 @@ class DoubaoService:
         temperature: Optional[float] = None,
         max_output_tokens: Optional[int] = None,
         stream: bool = False,
+        stop: Optional[Sequence[str]] = None,
     ) -> Dict[str, object]:
         """
         Convenience helper for single-turn prompts.
@@ -180,6 +182,7 @@ class DoubaoService:
             temperature=temperature,
             max_output_tokens=max_output_tokens,
             stream=stream,
+            stop=stop,
         )
 
     def chat(
@@ -191,6 +194,7 @@ class DoubaoService:
         stream: bool = False,
         tools: Optional[List[Dict[str, object]]] = None,
         tool_choice: Optional[str] = None,
+        stop: Optional[Sequence[str]] = None,
         extra_body: Optional[Dict[str, object]] = None,
     ) -> Dict[str, object]:
         """
@@ -203,6 +207,7 @@ class DoubaoService:
             stream: when True, returns a generator yielding text deltas.
             tools: optional list of tool definitions for function calling.
             tool_choice: optional tool choice mode ("auto", "none", or specific tool name).
+            stop: optional stop sequences that end generation early.
             extra_body: advanced Ark parameters to merge into payload.
 
         Returns:
@@ -242,6 +247,9 @@ class DoubaoService:
         if max_tokens is not None:
             payload["max_output_tokens"] = max_tokens
 
+        if stop:
+            payload["stop"] = list(stop)
+
         if extra_body:
             payload.update(extra_body)
 
@@ -376,6 +384,12 @@ class DoubaoService:
         return ""
 
 
+@functools.lru_cache(maxsize=1)
+def get_doubao_service() -> DoubaoService:
+    """Return a process-wide `DoubaoService` so callers share one HTTP connection pool."""
+    return DoubaoService()
+
+
 def stream_to_text(chunks: Iterable[str]) -> str:
     """Utility to concatenate streaming text fragments into a full string."""
     return "".join(chunks)
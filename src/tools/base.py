@@ -9,6 +9,19 @@ from pydantic import BaseModel, ConfigDict, Field
 from langchain.tools import BaseTool
 from langchain_core.tools import ToolException
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def dumps_json(payload: Any) -> str:
+    """Serialize ``payload`` to a JSON string, using orjson when it is installed."""
+
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False)
+
 
 class ToolExecutionError(ToolException):
     """Raised when a tool cannot complete its requested action."""
@@ -36,7 +49,7 @@ class ContextAwareTool(BaseTool):
     @staticmethod
     def _as_json(payload: Mapping[str, Any]) -> str:
         try:
-            return json.dumps(payload, ensure_ascii=False)
+            return dumps_json(payload)
         except TypeError as exc:  # noqa: BLE001
             raise ToolExecutionError(f"Tool result is not JSON serializable: {exc}") from exc
 
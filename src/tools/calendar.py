@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -22,6 +23,9 @@ if load_dotenv is not None:
     load_dotenv(override=False)
 
 BASE_WORKDIR = Path(os.getenv("PERSONAL_AGENT_WORKDIR", ".")).resolve()
+SLUG_MAX_LENGTH = 32
+# Anything other than letters, digits, '-' and '_' becomes '-' in generated filenames.
+_SLUG_INVALID_RE = re.compile(r"[^\w-]")
 
 app = FastMCP("calendar-tool")
 
@@ -118,7 +122,8 @@ def add_calendar_event(
         if params.filename:
             filename = params.filename if params.filename.endswith(".ics") else f"{params.filename}.ics"
         else:
-            slug = "".join(c if c.isalnum() or c in ("-", "_") else "-" for c in params.title.lower())[:32] or "event"
+            title_head = params.title[:SLUG_MAX_LENGTH].lower()
+            slug = _SLUG_INVALID_RE.sub("-", title_head)[:SLUG_MAX_LENGTH] or "event"
             filename = f"{start_dt.strftime('%Y%m%d-%H%M')}-{slug}.ics"
 
         file_path = output_dir / filename
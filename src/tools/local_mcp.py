@@ -3,22 +3,43 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import atexit
+import functools
 import os
 import sys
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type, ClassVar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type, ClassVar
 
-from mcp import ClientSession
-from mcp.client.stdio import StdioServerParameters, stdio_client
-from mcp.types import Tool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
-from .base import ContextAwareTool, ToolContext, ToolExecutionError
+from .base import ContextAwareTool, ToolContext, ToolExecutionError, dumps_json
+
+if TYPE_CHECKING:
+    # The MCP SDK is imported lazily, when a service is first spawned.
+    from mcp import ClientSession
+    from mcp.client.stdio import StdioServerParameters
+    from mcp.types import Tool
 
 
 BASE_DIR = Path(__file__).resolve().parent
+TOOL_CACHE_TTL_SECONDS = 300.0
+CALL_TIMEOUT_SECONDS = float(os.getenv("LOCAL_MCP_CALL_TIMEOUT", "300"))
+# Silence progress bars and chatty library logging in spawned services; definition.env still wins.
+SERVICE_QUIET_ENV: Dict[str, str] = {
+    "TQDM_DISABLE": "1",
+    "HF_HUB_DISABLE_PROGRESS_BARS": "1",
+    "TRANSFORMERS_VERBOSITY": "error",
+    "TOKENIZERS_PARALLELISM": "false",
+    "NO_COLOR": "1",
+}
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+_SERVICE_CLIENTS: Dict[Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]], "LocalMCPServiceClient"] = {}
+_SERVICE_CLIENTS_LOCK = threading.Lock()
 
 
 @dataclass
@@ -68,8 +89,10 @@ class LocalMCPTool(ContextAwareTool):
     ) -> None:
         super().__init__(context=context, **kwargs)
         self._service_definitions = service_definitions or DEFAULT_SERVICES
-        self._service_clients = [LocalMCPServiceClient(defn) for defn in self._service_definitions]
+        self._service_clients = [_get_service_client(defn) for defn in self._service_definitions]
         self._tool_map: Dict[str, LocalMCPServiceClient] = {}
+        self._tool_summary: Optional[List[Dict[str, str]]] = None
+        self._tool_map_expiry = 0.0
 
     def _run(
         self,
@@ -92,15 +115,18 @@ class LocalMCPTool(ContextAwareTool):
         if not isinstance(payload, dict):
             raise ToolExecutionError("Parameter 'arguments' must be a JSON object.")
 
-        if refresh_services or tool_name not in self._tool_map:
+        if refresh_services or tool_name not in self._tool_map or self._tool_map_expired():
             self._refresh_tool_map(force_refresh=refresh_services)
 
         service_client = self._tool_map.get(tool_name)
+        if service_client is None and not refresh_services:
+            # The tool may have been added since the cache was filled; ask the services once more.
+            self._refresh_tool_map(force_refresh=True)
+            service_client = self._tool_map.get(tool_name)
         if service_client is None:
-            tools = self._list_all_tools(force_refresh=True)
             return self._as_json(
                 {
-                    "available_tools": tools,
+                    "available_tools": self._tool_summary,
                     "message": f"Tool '{tool_name}' is not available. Choose one of the tools listed above.",
                 }
             )
@@ -110,93 +136,276 @@ class LocalMCPTool(ContextAwareTool):
         except ToolExecutionError as exc:
             return self._as_json({"tool": tool_name, "arguments": payload, "error": str(exc)})
 
-    async def _arun(self, *args, **kwargs) -> str:  # noqa: ANN002, ANN003
-        raise NotImplementedError("LocalMCPTool does not support async execution.")
+    async def _arun(
+        self,
+        tool_name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        refresh_services: bool = False,
+    ) -> str:
+        tool_name = (tool_name or "").strip()
+        payload = arguments or {}
+
+        if refresh_services or tool_name not in self._tool_map or self._tool_map_expired():
+            # Listing tools spawns every service; keep that synchronous path off the event loop.
+            return await asyncio.to_thread(self._run, tool_name, arguments, refresh_services)
+
+        if not isinstance(payload, dict):
+            raise ToolExecutionError("Parameter 'arguments' must be a JSON object.")
+
+        service_client = self._tool_map.get(tool_name)
+        if service_client is None:
+            # The map was swapped by a concurrent refresh; fall back to the full synchronous path.
+            return await asyncio.to_thread(self._run, tool_name, arguments, refresh_services)
+        try:
+            return await service_client.acall_tool_json(tool_name, payload)
+        except ToolExecutionError as exc:
+            return self._as_json({"tool": tool_name, "arguments": payload, "error": str(exc)})
 
     def _refresh_tool_map(self, force_refresh: bool = False) -> None:
-        self._tool_map.clear()
+        """Rebuild the name -> client map and the tool summary in a single pass over the services.
+
+        Both are built locally and published by plain assignment, so callers running concurrently
+        (``_arun`` offloads refreshes to worker threads) never observe an empty or partial map.
+        """
+        tool_map: Dict[str, LocalMCPServiceClient] = {}
+        summary: List[Dict[str, str]] = []
         for client in self._service_clients:
             try:
                 tools = client.list_tools(force_refresh=force_refresh)
             except ToolExecutionError:
                 continue
             for tool in tools:
+                summary.append({"name": tool.name, "description": tool.description or ""})
                 if tool.name:
-                    self._tool_map[tool.name] = client
+                    tool_map[tool.name] = client
+        self._tool_map = tool_map
+        self._tool_summary = summary
+        self._tool_map_expiry = time.monotonic() + TOOL_CACHE_TTL_SECONDS
+
+    def _tool_map_expired(self) -> bool:
+        return time.monotonic() >= self._tool_map_expiry
 
     def _list_all_tools(self, force_refresh: bool = False) -> List[Dict[str, str]]:
-        tools: List[Dict[str, str]] = []
-        for client in self._service_clients:
-            try:
-                for tool in client.list_tools(force_refresh=force_refresh):
-                    tools.append({"name": tool.name, "description": tool.description or ""})
-            except ToolExecutionError:
-                continue
-        return tools
+        if force_refresh or self._tool_summary is None or self._tool_map_expired():
+            self._refresh_tool_map(force_refresh=force_refresh)
+        return self._tool_summary
 
     def list_available_tools(self, *, force_refresh: bool = False) -> List[Dict[str, str]]:
         """Public helper for callers that want to inspect available MCP tools."""
-        return self._list_all_tools(force_refresh=force_refresh)
+        return list(self._list_all_tools(force_refresh=force_refresh))
+
+
+@functools.lru_cache(maxsize=1)
+def _content_adapter() -> TypeAdapter:
+    """Dump a whole result.content list through one compiled serializer instead of per-block model_dump calls."""
+    try:
+        from mcp.types import ContentBlock
+    except ImportError:  # pragma: no cover - older MCP SDKs without the ContentBlock alias
+        ContentBlock = Any
+    return TypeAdapter(List[ContentBlock])
+
+
+def _is_protocol_error(exc: BaseException) -> bool:
+    """True when the service answered with a JSON-RPC error, i.e. the session itself is still healthy."""
+    try:
+        from mcp.shared.exceptions import McpError
+        from mcp.types import CONNECTION_CLOSED
+    except ImportError:
+        return False
+    # The SDK also fails pending requests with CONNECTION_CLOSED when the service process dies.
+    return isinstance(exc, McpError) and exc.error.code != CONNECTION_CLOSED
+
+
+def _get_service_client(definition: ServiceDefinition) -> LocalMCPServiceClient:
+    """Return the process-wide client for a service, so every tool instance shares one service process."""
+    key = (tuple(definition.command), tuple(sorted((definition.env or {}).items())))
+    with _SERVICE_CLIENTS_LOCK:
+        client = _SERVICE_CLIENTS.get(key)
+        if client is None:
+            client = _SERVICE_CLIENTS[key] = LocalMCPServiceClient(definition)
+        return client
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop shared by all service clients, starting its daemon thread on first use."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="local-mcp-loop", daemon=True).start()
+            atexit.register(loop.call_soon_threadsafe, loop.stop)
+            _LOOP = loop
+        return _LOOP
 
 
 class LocalMCPServiceClient:
-    """Small helper that spawns a FastMCP service via stdio and proxies requests."""
+    """Keeps one FastMCP service process and MCP session alive and proxies requests to it.
+
+    Sessions live on a shared event loop running in a daemon thread, so synchronous callers
+    only pay a JSON-RPC round trip per call instead of a process spawn plus handshake.
+    Use ``_get_service_client`` rather than constructing clients directly, so that each
+    service definition maps to a single process for the lifetime of the interpreter.
+    """
 
-    def __init__(self, definition: ServiceDefinition) -> None:
+    def __init__(self, definition: ServiceDefinition, *, tool_cache_ttl: float = TOOL_CACHE_TTL_SECONDS) -> None:
         self.definition = definition
+        self.tool_cache_ttl = tool_cache_ttl
+        self._server_params: Optional[StdioServerParameters] = None
         self._tool_cache: Optional[List[Tool]] = None
+        self._tool_cache_expiry = 0.0
+        self._session: Optional[ClientSession] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._session_closing: Optional[asyncio.Event] = None
+        self._close_registered = False
 
     def list_tools(self, *, force_refresh: bool = False) -> List[Tool]:
-        if self._tool_cache is not None and not force_refresh:
+        if self._tool_cache is not None and not force_refresh and time.monotonic() < self._tool_cache_expiry:
             return self._tool_cache
 
-        try:
-            tools = asyncio.run(self._list_tools())
-        except RuntimeError:
-            tools = self._run_in_loop(self._list_tools())
-
+        tools = self._run_async(self._list_tools())
         self._tool_cache = tools
+        self._tool_cache_expiry = time.monotonic() + self.tool_cache_ttl
         return tools
 
     def call_tool_json(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        payload = self._run_async(self._call_tool(tool_name, arguments))
+        return dumps_json(payload)
+
+    async def acall_tool_json(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        future = asyncio.run_coroutine_threadsafe(self._call_tool(tool_name, arguments), _get_event_loop())
+        return dumps_json(await asyncio.wrap_future(future))
+
+    def close(self) -> None:
+        """Stop the service process if a session is open."""
+        if self._session_task is None:
+            return
         try:
-            payload = asyncio.run(self._call_tool(tool_name, arguments))
-        except RuntimeError:
-            payload = self._run_in_loop(self._call_tool(tool_name, arguments))
-        return json.dumps(payload, ensure_ascii=False)
+            self._run_async(self._close_session(), timeout=5)
+        except Exception:  # noqa: BLE001
+            pass
 
     async def _list_tools(self) -> List[Tool]:
-        params = self._server_parameters()
-        async with stdio_client(params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.list_tools()
-                return result.tools
+        try:
+            return await asyncio.wait_for(self._list_tools_with_retry(), timeout=CALL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError as exc:
+            # A service that never answers is dropped, so it cannot block tool discovery for the others.
+            await self._close_session()
+            raise ToolExecutionError(
+                f"Service '{self.definition.name}' did not list its tools within {CALL_TIMEOUT_SECONDS:g}s."
+            ) from exc
+
+    async def _list_tools_with_retry(self) -> List[Tool]:
+        try:
+            session = await self._ensure_session()
+            result = await session.list_tools()
+        except Exception as exc:  # noqa: BLE001
+            if _is_protocol_error(exc):
+                raise
+            # Listing is idempotent, so reconnect once to a fresh service process and retry.
+            await self._close_session()
+            session = await self._ensure_session()
+            result = await session.list_tools()
+        return result.tools
 
     async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        params = self._server_parameters()
-        async with stdio_client(params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.call_tool(tool_name, arguments=arguments or None)
-                return {
-                    "tool": tool_name,
-                    "arguments": arguments,
-                    "is_error": result.isError,
-                    "content": [block.model_dump(mode="python") for block in result.content],
-                    "structured_content": result.structuredContent,
-                }
-
-    def _server_parameters(self) -> StdioServerParameters:
-        command, *args = self.definition.command
-        return StdioServerParameters(command=command, args=args, env=self.definition.env)
-
-    @staticmethod
-    def _run_in_loop(coro):
-        loop = asyncio.new_event_loop()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CALL_TIMEOUT_SECONDS
+        try:
+            session = await asyncio.wait_for(self._ensure_session(), timeout=CALL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError as exc:
+            # A service stuck in spawn or initialize() is dropped so it cannot hold up the shared loop.
+            await self._close_session()
+            raise ToolExecutionError(
+                f"Service '{self.definition.name}' did not start within {CALL_TIMEOUT_SECONDS:g}s."
+            ) from exc
         try:
-            return loop.run_until_complete(coro)
+            result = await asyncio.wait_for(
+                session.call_tool(tool_name, arguments=arguments or None),
+                timeout=max(deadline - loop.time(), 0.0),
+            )
+        except asyncio.TimeoutError as exc:
+            # Only this request is abandoned; the session stays up for later calls.
+            raise ToolExecutionError(f"Tool '{tool_name}' timed out after {CALL_TIMEOUT_SECONDS:g}s.") from exc
+        except Exception as exc:  # noqa: BLE001
+            if not _is_protocol_error(exc):
+                # The transport failed, so the service is gone; respawn it on the next request.
+                # Tool calls are not retried here because they may have side effects.
+                await self._close_session()
+            raise
+        return {
+            "tool": tool_name,
+            "arguments": arguments,
+            "is_error": result.isError,
+            "content": _content_adapter().dump_python(result.content, mode="python"),
+            "structured_content": result.structuredContent,
+        }
+
+    async def _ensure_session(self) -> ClientSession:
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        async with self._session_lock:
+            if self._session is None:
+                if not self._close_registered:
+                    # Registered after the shared loop's own atexit hook, so it runs before the loop stops.
+                    atexit.register(self.close)
+                    self._close_registered = True
+                ready: asyncio.Future = asyncio.get_running_loop().create_future()
+                task = self._session_task = asyncio.create_task(self._hold_session(ready))
+                try:
+                    self._session = await ready
+                except BaseException:
+                    # Startup failed or the caller gave up; do not leave a half-started service behind.
+                    task.cancel()
+                    if self._session_task is task:
+                        self._session_task = None
+                    raise
+            return self._session
+
+    async def _hold_session(self, ready: asyncio.Future) -> None:
+        # stdio_client/ClientSession must be entered and exited by the same task, so one task owns them.
+        try:
+            from mcp import ClientSession
+            from mcp.client.stdio import StdioServerParameters, get_default_environment, stdio_client
+        except ImportError:
+            ready.set_exception(RuntimeError("Missing dependency 'mcp'. Install it with 'pip install mcp'."))
+            return
+
+        if self._server_params is None:
+            command, *args = self.definition.command
+            env = {**get_default_environment(), **SERVICE_QUIET_ENV, **(self.definition.env or {})}
+            self._server_params = StdioServerParameters(command=command, args=args, env=env)
+
+        closing = asyncio.Event()
+        try:
+            async with stdio_client(self._server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self._session_closing = closing
+                    ready.set_result(session)
+                    await closing.wait()
+        except Exception as exc:  # noqa: BLE001
+            if not ready.done():
+                ready.set_exception(exc)
         finally:
-            loop.close()
-
+            if not ready.done():
+                ready.cancel()
+            if self._session_closing is closing:
+                self._session = None
+                self._session_closing = None
+
+    async def _close_session(self) -> None:
+        task, closing = self._session_task, self._session_closing
+        self._session = None
+        self._session_task = None
+        self._session_closing = None
+        if closing is not None:
+            closing.set()
+        elif task is not None:
+            task.cancel()
+        if task is not None and task is not asyncio.current_task():
+            await asyncio.gather(task, return_exceptions=True)
 
+    @staticmethod
+    def _run_async(coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result(timeout)
@@ -2,18 +2,32 @@
 
 from __future__ import annotations
 
+import atexit
+import hashlib
 import json
+import logging
 import os
+import sqlite3
+import sys
 import threading
-from dataclasses import dataclass
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
-import numpy as np
-from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel, Field, ValidationError
-from sqlalchemy import create_engine, text
+# BLAS/OpenMP read these once when first loaded, so they must be set before numpy/torch/faiss import.
+NUM_THREADS = int(os.getenv("MEMORY_NUM_THREADS", str(os.cpu_count() or 4)))
+os.environ.setdefault("OMP_NUM_THREADS", str(NUM_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(NUM_THREADS))
+
+import numpy as np  # noqa: E402
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+from pydantic import BaseModel, Field, ValidationError  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
 
 try:
     import faiss  # type: ignore
@@ -21,12 +35,20 @@ except ImportError as exc:  # pragma: no cover
     raise RuntimeError("Missing dependency 'faiss-cpu'. Install it with 'pip install faiss-cpu'.") from exc
 
 try:
+    import torch  # type: ignore
     from sentence_transformers import SentenceTransformer  # type: ignore
 except ImportError as exc:  # pragma: no cover
     raise RuntimeError(
         "Missing dependency 'sentence-transformers'. Install it with 'pip install sentence-transformers'."
     ) from exc
 
+faiss.omp_set_num_threads(NUM_THREADS)
+torch.set_num_threads(NUM_THREADS)
+try:
+    torch.set_num_interop_threads(1)
+except RuntimeError:  # pragma: no cover - already fixed by an earlier import
+    pass
+
 try:
     from dotenv import load_dotenv
 except ImportError:  # pragma: no cover - optional dependency
@@ -56,8 +78,28 @@ DEFAULT_LOOKBACK_DAYS = int(os.getenv("MEMORY_LOOKBACK_DAYS", "30"))
 DEFAULT_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", "5000"))
 DEFAULT_EMBED_MODEL = os.getenv("MEMORY_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 DEFAULT_REFRESH_INTERVAL_HOURS = float(os.getenv("MEMORY_REFRESH_INTERVAL_HOURS", "6"))
+ENCODE_BATCH_SIZE = 64
+ENCODE_PROCESSES = int(os.getenv("MEMORY_ENCODE_PROCESSES", str(min(os.cpu_count() or 1, 4))))
+MULTI_PROCESS_MIN_TEXTS = 256
+# Split the thread budget across encode workers instead of giving each of them all of it.
+ENCODE_WORKER_THREADS = max(1, NUM_THREADS // max(ENCODE_PROCESSES, 1))
+FETCH_BATCH_SIZE = 500
+QUERY_CACHE_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("MEMORY_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+# SentenceTransformer truncates at its own max_seq_length, not the tokenizer's model_max_length.
+ONNX_DEFAULT_MAX_SEQ_LENGTH = 256
+DEFAULT_USE_ONNX = os.getenv("MEMORY_USE_ONNX", "0").strip().lower() in {"1", "true", "yes"}
+# Below this many documents a brute-force flat scan is both exact and fast enough.
+HNSW_MIN_DOCUMENTS = int(os.getenv("MEMORY_HNSW_MIN_DOCUMENTS", "1000"))
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_MIN_EF_SEARCH = 32
+# Map flat/HNSW vector storage on load where the installed FAISS supports it.
+INDEX_READ_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+DOC_COLUMNS = ("message_id", "session_id", "role", "created_at", "text", "text_hash", "snippet")
 
 app = FastMCP("memory-service")
+logger = logging.getLogger("memory-service")
 
 
 @dataclass
@@ -75,12 +117,179 @@ class MCPResponse:
         return payload
 
 
+@contextmanager
+def _thread_env(num_threads: int) -> Iterator[None]:
+    """Temporarily set the thread-count variables that child processes inherit."""
+    names = ("MEMORY_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS")
+    saved = {name: os.environ.get(name) for name in names}
+    os.environ.update({name: str(num_threads) for name in names})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
 class MemorySearchSchema(BaseModel):
     query: str = Field(..., description="Search query describing the memory to retrieve.")
     top_k: int = Field(5, ge=1, le=20, description="Maximum number of results to return.")
     min_score: float = Field(0.25, ge=0.0, le=1.0, description="Minimum cosine similarity score to keep.")
 
 
+@dataclass
+class MemoryDocuments:
+    """Column-oriented document store; row ``i`` of every column is FAISS vector ``i``."""
+
+    message_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    session_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    roles: List[str] = field(default_factory=list)
+    created_at: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    text_hashes: List[str] = field(default_factory=list)
+    snippets: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[object]]) -> "MemoryDocuments":
+        """Build from tuples ordered like `DOC_COLUMNS`."""
+        if not rows:
+            return cls()
+        message_ids, session_ids, roles, created_at, texts, text_hashes, snippets = zip(*rows)
+        return cls(
+            message_ids=np.asarray(message_ids, dtype=np.int64),
+            session_ids=np.asarray(session_ids, dtype=np.int64),
+            roles=[sys.intern(str(role)) for role in roles],
+            created_at=list(created_at),
+            texts=list(texts),
+            text_hashes=list(text_hashes),
+            snippets=list(snippets),
+        )
+
+    def rows(self) -> Iterator[Tuple[object, ...]]:
+        """Yield tuples ordered like `DOC_COLUMNS`."""
+        return zip(
+            self.message_ids.tolist(),
+            self.session_ids.tolist(),
+            self.roles,
+            self.created_at,
+            self.texts,
+            self.text_hashes,
+            self.snippets,
+        )
+
+
+class OnnxSentenceEncoder:
+    """Int8-quantized ONNX Runtime stand-in for the parts of `SentenceTransformer` used here."""
+
+    def __init__(self, model_name: str, cache_dir: Path, batch_size: int = ENCODE_BATCH_SIZE) -> None:
+        try:
+            import onnxruntime as ort  # type: ignore
+            from transformers import AutoTokenizer  # type: ignore
+        except ImportError as exc:  # pragma: no cover
+            raise RuntimeError(
+                "Missing dependency 'onnxruntime'. Install it with 'pip install optimum[onnxruntime]'."
+            ) from exc
+
+        self.batch_size = batch_size
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        quantized_path = cache_dir / "model_quantized.onnx"
+        if not quantized_path.exists():
+            self._export(model_name, cache_dir, quantized_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = NUM_THREADS
+        self._session = ort.InferenceSession(str(quantized_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = [item.name for item in self._session.get_inputs()]
+        self._tokenizer = AutoTokenizer.from_pretrained(str(cache_dir))
+        self.max_seq_length = self._read_max_seq_length(cache_dir)
+        self._dim = int(self.encode(["dimension probe"]).shape[1])
+
+    @staticmethod
+    def _export(model_name: str, cache_dir: Path, quantized_path: Path) -> None:
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+            from optimum.onnxruntime import ORTModelForFeatureExtraction  # type: ignore
+            from transformers import AutoTokenizer  # type: ignore
+        except ImportError as exc:  # pragma: no cover
+            raise RuntimeError(
+                "Missing dependency 'optimum'. Install it with 'pip install optimum[onnxruntime]'."
+            ) from exc
+
+        model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        model.save_pretrained(str(cache_dir))
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(str(cache_dir))
+        OnnxSentenceEncoder._save_sentence_config(model_name, cache_dir)
+        quantize_dynamic(str(cache_dir / "model.onnx"), str(quantized_path), weight_type=QuantType.QInt8)
+
+    @staticmethod
+    def _save_sentence_config(model_name: str, cache_dir: Path) -> None:
+        """Keep the model's sentence_bert_config.json next to the export so max_seq_length matches."""
+        local_config = Path(model_name) / "sentence_bert_config.json"
+        try:
+            if local_config.exists():
+                config_path = local_config
+            else:
+                from huggingface_hub import hf_hub_download  # type: ignore
+
+                config_path = Path(hf_hub_download(model_name, "sentence_bert_config.json"))
+            (cache_dir / "sentence_bert_config.json").write_bytes(config_path.read_bytes())
+        except Exception:  # noqa: BLE001
+            # Models without the file fall back to ONNX_DEFAULT_MAX_SEQ_LENGTH.
+            pass
+
+    @staticmethod
+    def _read_max_seq_length(cache_dir: Path) -> int:
+        try:
+            config = json.loads((cache_dir / "sentence_bert_config.json").read_text(encoding="utf-8"))
+            return int(config["max_seq_length"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return ONNX_DEFAULT_MAX_SEQ_LENGTH
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dim
+
+    def encode(
+        self,
+        texts: Sequence[str],
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+    ) -> np.ndarray:
+        # Batch texts of similar length together so padding stays short, then restore input order.
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+        batches: List[np.ndarray] = []
+        for start in range(0, len(sorted_texts), self.batch_size):
+            tokens = self._tokenizer(
+                sorted_texts[start : start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            input_ids = tokens["input_ids"]
+            feeds = {
+                name: np.asarray(tokens[name] if name in tokens else np.zeros_like(input_ids), dtype=np.int64)
+                for name in self._input_names
+            }
+            hidden = self._session.run(None, feeds)[0]
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            batches.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = np.empty((len(sorted_texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        if normalize_embeddings and embeddings.size:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+
 class MemoryIndex:
     def __init__(
         self,
@@ -91,6 +300,7 @@ class MemoryIndex:
         max_messages: int,
         embed_model_name: str,
         refresh_interval_hours: float,
+        use_onnx: bool = False,
     ) -> None:
         self.db_url = db_url
         self._engine = create_engine(
@@ -105,159 +315,393 @@ class MemoryIndex:
         self.embed_model_name = embed_model_name
         self.refresh_interval = timedelta(hours=refresh_interval_hours)
 
-        self.index_file = self.index_dir / "memory.faiss"
-        self.metadata_file = self.index_dir / "memory_metadata.json"
+        # SQLite is the commit point: its meta row names the generation of the FAISS and embeddings files.
+        self.metadata_file = self.index_dir / "memory_meta.db"
 
         self._lock = threading.Lock()
-        self._model = SentenceTransformer(self.embed_model_name)
+        # Serialises rebuilds; always acquired before (never while holding) self._lock.
+        self._build_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-refresh")
+        self._refresh_future: Optional[Future] = None
+        # Set after a failed background refresh so a broken database is not retried on every search.
+        self._refresh_retry_at: Optional[datetime] = None
+        self._model: Union[SentenceTransformer, OnnxSentenceEncoder]
+        if use_onnx:
+            onnx_dir = self.index_dir / "onnx" / self.embed_model_name.replace("/", "__")
+            self._model = OnnxSentenceEncoder(self.embed_model_name, onnx_dir)
+        else:
+            self._model = SentenceTransformer(self.embed_model_name)
+        self._encoder_id = f"{'onnx' if use_onnx else 'sentence-transformers'}:{self.embed_model_name}"
         self._dim = self._model.get_sentence_embedding_dimension()
-        self._index: Optional[faiss.IndexFlatIP] = None
-        self._documents: List[Dict[str, object]] = []
+        self._query_buf = np.zeros((1, self._dim), dtype="float32")
+        self._index: Optional[faiss.Index] = None
+        self._documents = MemoryDocuments()
+        self._embeddings: Optional[np.ndarray] = None
+        self._encode_pool: Optional[Dict[str, object]] = None
+        # (query, top_k, min_score) -> (query embedding, results); cleared whenever the index changes.
+        self._query_cache: "OrderedDict[Tuple[str, int, float], Tuple[np.ndarray, List[Dict[str, object]]]]" = (
+            OrderedDict()
+        )
         self._built_at: Optional[datetime] = None
 
         self._load_or_build()
 
     def search(self, query: str, top_k: int, min_score: float) -> List[Dict[str, object]]:
+        self._ensure_fresh_index()
         with self._lock:
-            self._ensure_fresh_index()
             if not self._documents or self._index is None:
                 return []
 
-            embedding = self._encode([query])[0]
-            scores, indices = self._index.search(np.array([embedding]), top_k)
-            scored_results: List[Dict[str, object]] = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx == -1 or score < min_score:
-                    continue
-                doc = self._documents[idx]
-                scored_results.append(
-                    {
-                        "score": float(score),
-                        "text": doc["text"],
-                        "message_id": doc["message_id"],
-                        "session_id": doc["session_id"],
-                        "role": doc["role"],
-                        "created_at": doc["created_at"],
-                        "snippet": doc["snippet"],
-                    }
+            cache_key = (query.strip(), top_k, min_score)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._query_cache.move_to_end(cache_key)
+                return [dict(item) for item in cached[1]]
+
+            np.copyto(self._query_buf, self._encode([query]))
+            similar = self._find_similar_query(top_k, min_score)
+            if similar is not None:
+                return [dict(item) for item in similar]
+
+            hnsw = getattr(self._index, "hnsw", None)
+            if hnsw is not None:
+                hnsw.efSearch = max(HNSW_MIN_EF_SEARCH, top_k * 4)
+            scores, indices = self._index.search(self._query_buf, top_k)
+            keep = (indices[0] >= 0) & (scores[0] >= min_score)
+            rows = indices[0][keep]
+            docs = self._documents
+            scored_results: List[Dict[str, object]] = [
+                {
+                    "score": score,
+                    "text": docs.texts[row],
+                    "message_id": message_id,
+                    "session_id": session_id,
+                    "role": docs.roles[row],
+                    "created_at": docs.created_at[row],
+                    "snippet": docs.snippets[row],
+                }
+                for score, row, message_id, session_id in zip(
+                    scores[0][keep].tolist(),
+                    rows.tolist(),
+                    docs.message_ids[rows].tolist(),
+                    docs.session_ids[rows].tolist(),
                 )
-            return scored_results
+            ]
+            self._remember_query(cache_key, scored_results)
+            return [dict(item) for item in scored_results]
+
+    def _find_similar_query(self, top_k: int, min_score: float) -> Optional[List[Dict[str, object]]]:
+        """Return cached results of a near-duplicate query (cosine >= threshold) with the same limits."""
+        candidates = [
+            entry for key, entry in self._query_cache.items() if key[1] == top_k and key[2] == min_score
+        ]
+        if not candidates:
+            return None
+        similarities = np.stack([vector for vector, _ in candidates]) @ self._query_buf[0]
+        best = int(np.argmax(similarities))
+        if similarities[best] < SEMANTIC_CACHE_THRESHOLD:
+            return None
+        return candidates[best][1]
+
+    def _remember_query(self, key: Tuple[str, int, float], results: List[Dict[str, object]]) -> None:
+        self._query_cache[key] = (self._query_buf[0].copy(), results)
+        if len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
 
     def refresh(self, force: bool = False) -> Dict[str, object]:
+        self._rebuild(force=force)
         with self._lock:
-            self._build_index(force=force)
             return {
                 "documents": len(self._documents),
                 "built_at": self._built_at.isoformat() if self._built_at else None,
             }
 
     def _load_or_build(self) -> None:
-        with self._lock:
-            if self.index_file.exists() and self.metadata_file.exists():
-                try:
+        if self.metadata_file.exists():
+            try:
+                with self._lock:
                     self._load_index()
-                except Exception:  # noqa: BLE001
-                    self._build_index(force=True)
-            else:
-                self._build_index(force=True)
+                return
+            except Exception:  # noqa: BLE001
+                logger.warning(
+                    "Could not load the persisted memory index from %s; rebuilding it.",
+                    self.index_dir,
+                    exc_info=True,
+                )
+        self._rebuild(force=True)
 
     def _ensure_fresh_index(self) -> None:
-        if self._built_at is None:
-            self._build_index(force=True)
+        future: Optional[Future] = None
+        with self._lock:
+            built_at = self._built_at
+            if built_at is not None:
+                now = datetime.now(timezone.utc)
+                stale = now - built_at > self.refresh_interval
+                refreshing = self._refresh_future is not None and not self._refresh_future.done()
+                backing_off = self._refresh_retry_at is not None and now < self._refresh_retry_at
+                if stale and not refreshing and not backing_off:
+                    # Keep serving the current index while the refreshed one is built.
+                    future = self._refresh_future = self._refresh_executor.submit(self._rebuild, False)
+        if future is not None:
+            # Attached outside the lock: the callback runs inline if the future has already finished.
+            future.add_done_callback(self._on_refresh_done)
+        if built_at is None:
+            self._rebuild(force=True)
+
+    def _on_refresh_done(self, future: Future) -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is None:
+            self._refresh_retry_at = None
             return
-        if datetime.now(timezone.utc) - self._built_at > self.refresh_interval:
-            self._build_index(force=True)
+        self._refresh_retry_at = datetime.now(timezone.utc) + self.refresh_interval
+        logger.error(
+            "Background memory index refresh failed; next attempt after %s.",
+            self._refresh_retry_at.isoformat(),
+            exc_info=exc,
+        )
 
-    def _build_index(self, force: bool) -> None:
-        docs = self._fetch_documents()
-        embeddings = self._encode([doc["text"] for doc in docs]) if docs else np.zeros((0, self._dim), dtype="float32")
-        index = faiss.IndexFlatIP(self._dim)
+    def _rebuild(self, force: bool) -> None:
+        with self._build_lock:
+            with self._lock:
+                previous_docs, previous_embeddings = self._documents, self._embeddings
+            docs = self._fetch_documents()
+            embeddings = self._embed_documents(
+                docs,
+                previous_docs=previous_docs,
+                previous_embeddings=None if force else previous_embeddings,
+            )
+            # Drop the old (possibly memory-mapped) embeddings so their file can be removed after persisting.
+            del previous_docs, previous_embeddings
+            index = self._create_index(embeddings)
+            built_at = datetime.now(timezone.utc)
+            with self._lock:
+                self._index = index
+                self._documents = docs
+                self._embeddings = embeddings
+                self._query_cache.clear()
+                self._built_at = built_at
+            # Persist outside self._lock so searches keep running; _build_lock still serialises writers.
+            self._persist_index(index, docs, embeddings, built_at)
+
+    def _embed_documents(
+        self,
+        docs: MemoryDocuments,
+        *,
+        previous_docs: MemoryDocuments,
+        previous_embeddings: Optional[np.ndarray],
+    ) -> np.ndarray:
+        """Encode only documents whose (message_id, text_hash) is not already embedded."""
+        embeddings = np.zeros((len(docs), self._dim), dtype="float32")
+        cached_rows: Dict[Tuple[int, str], int] = {}
+        if previous_embeddings is not None and len(previous_embeddings) == len(previous_docs):
+            cached_rows = {
+                key: row
+                for row, key in enumerate(zip(previous_docs.message_ids.tolist(), previous_docs.text_hashes))
+            }
+
+        missing: List[int] = []
+        for row, key in enumerate(zip(docs.message_ids.tolist(), docs.text_hashes)):
+            cached = cached_rows.get(key)
+            if cached is None:
+                missing.append(row)
+            else:
+                embeddings[row] = previous_embeddings[cached]
+        if missing:
+            embeddings[missing] = self._encode([docs.texts[row] for row in missing])
+        return embeddings
+
+    def _create_index(self, embeddings: np.ndarray) -> faiss.Index:
+        if embeddings.shape[0] >= HNSW_MIN_DOCUMENTS:
+            # Store graph vectors as fp16: half the bytes touched per distance, negligible recall loss.
+            index = faiss.IndexHNSWSQ(self._dim, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.train(embeddings)
+        else:
+            index = faiss.IndexFlatIP(self._dim)
         if embeddings.shape[0]:
             index.add(embeddings)
-        self._index = index
-        self._documents = docs
-        self._built_at = datetime.now(timezone.utc)
-        self._persist_index()
+        return index
+
+    def _index_path(self, generation: str) -> Path:
+        return self.index_dir / f"memory.{generation}.faiss"
+
+    def _embeddings_path(self, generation: str) -> Path:
+        return self.index_dir / f"memory_embeddings.{generation}.npy"
 
     def _load_index(self) -> None:
-        self._index = faiss.read_index(str(self.index_file))
-        with self.metadata_file.open("r", encoding="utf-8") as fh:
-            payload = json.load(fh)
-        self._documents = payload.get("documents", [])
-        built_at = payload.get("built_at")
+        with closing(self._connect_metadata()) as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            rows = conn.execute(f"SELECT {', '.join(DOC_COLUMNS)} FROM docs ORDER BY row").fetchall()
+        generation = meta.get("generation")
+        if not generation:
+            raise ValueError("Memory index metadata has no generation; rebuilding.")
+        self._index = faiss.read_index(str(self._index_path(generation)), INDEX_READ_FLAGS)
+        self._documents = MemoryDocuments.from_rows(rows)
+        if self._index.ntotal != len(self._documents):
+            raise ValueError("Memory index and metadata are out of sync.")
+        built_at = meta.get("built_at")
         self._built_at = datetime.fromisoformat(built_at) if built_at else None
+        self._embeddings = None
+        embeddings_file = self._embeddings_path(generation)
+        if meta.get("encoder") == self._encoder_id and embeddings_file.exists():
+            # Memory-map the side-file: rows are only paged in when a rebuild reuses them.
+            embeddings = np.load(embeddings_file, mmap_mode="r")
+            if embeddings.shape == (len(self._documents), self._dim):
+                self._embeddings = embeddings
+
+    def _persist_index(
+        self,
+        index: faiss.Index,
+        docs: MemoryDocuments,
+        embeddings: Optional[np.ndarray],
+        built_at: Optional[datetime],
+    ) -> None:
+        # Each persist writes new, generation-named files and never replaces a file that may still be
+        # memory-mapped (which fails on Windows). The SQLite transaction below switches generations
+        # atomically, so an interrupted persist leaves the previous generation fully intact.
+        generation = uuid.uuid4().hex
+        faiss.write_index(index, str(self._index_path(generation)))
+        if embeddings is not None:
+            with open(self._embeddings_path(generation), "wb") as fh:
+                np.save(fh, embeddings)
+
+        rows = [(row, *values) for row, values in enumerate(docs.rows())]
+        placeholders = ", ".join("?" * (len(DOC_COLUMNS) + 1))
+        with closing(self._connect_metadata()) as conn:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO docs (row, {', '.join(DOC_COLUMNS)}) VALUES ({placeholders})",
+                    rows,
+                )
+                conn.execute("DELETE FROM docs WHERE row >= ?", (len(rows),))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [
+                        ("built_at", built_at.isoformat() if built_at else None),
+                        ("encoder", self._encoder_id),
+                        ("generation", generation),
+                    ],
+                )
+        self._remove_stale_generations(generation)
 
-    def _persist_index(self) -> None:
-        if self._index is not None:
-            faiss.write_index(self._index, str(self.index_file))
-        with self.metadata_file.open("w", encoding="utf-8") as fh:
-            json.dump(
-                {"built_at": self._built_at.isoformat() if self._built_at else None, "documents": self._documents},
-                fh,
-                ensure_ascii=False,
-                indent=2,
-            )
+    def _remove_stale_generations(self, current: str) -> None:
+        keep = {self._index_path(current).name, self._embeddings_path(current).name}
+        patterns = ("memory*.faiss", "memory_embeddings*.npy", "*.tmp")
+        for path in {path for pattern in patterns for path in self.index_dir.glob(pattern)}:
+            if path.name in keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                # Still mapped by a reader (Windows); it is retried after the next persist.
+                pass
+
+    def _connect_metadata(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.metadata_file))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "row INTEGER PRIMARY KEY, message_id, session_id, role TEXT, "
+            "created_at TEXT, text TEXT, text_hash TEXT, snippet TEXT)"
+        )
+        return conn
 
     def _encode(self, texts: Sequence[str]) -> np.ndarray:
         if not texts:
             return np.zeros((0, self._dim), dtype="float32")
-        embeddings = self._model.encode(
-            list(texts),
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        )
+        if len(texts) >= MULTI_PROCESS_MIN_TEXTS and ENCODE_PROCESSES > 1 and isinstance(self._model, SentenceTransformer):
+            embeddings = self._model.encode_multi_process(
+                list(texts),
+                self._get_encode_pool(),
+                batch_size=ENCODE_BATCH_SIZE,
+                normalize_embeddings=True,
+            )
+        else:
+            embeddings = self._model.encode(
+                list(texts),
+                batch_size=ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
         return embeddings.astype("float32")
 
-    def _fetch_documents(self) -> List[Dict[str, object]]:
+    def _get_encode_pool(self) -> Dict[str, object]:
+        if self._encode_pool is None:
+            # Spawned workers read their thread counts from the environment when they import this module.
+            with _thread_env(ENCODE_WORKER_THREADS):
+                self._encode_pool = self._model.start_multi_process_pool(target_devices=["cpu"] * ENCODE_PROCESSES)
+            atexit.register(SentenceTransformer.stop_multi_process_pool, self._encode_pool)
+        return self._encode_pool
+
+    def _fetch_documents(self) -> MemoryDocuments:
         cutoff = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
         cutoff_str = cutoff.strftime("%Y-%m-%d %H:%M:%S")
+        # Pick the most recent messages, but stream them back oldest-first.
         query = """
             SELECT id, session_id, role, content, created_at
-            FROM messages
-            WHERE created_at IS NULL OR created_at >= :cutoff
-            ORDER BY created_at DESC
-            LIMIT :limit
+            FROM (
+                SELECT id, session_id, role, content, created_at
+                FROM messages
+                WHERE created_at IS NULL OR created_at >= :cutoff
+                ORDER BY created_at DESC
+                LIMIT :limit
+            ) AS recent
+            ORDER BY created_at ASC
         """
+        rows: List[Tuple[object, ...]] = []
         with self._engine.connect() as conn:
-            rows = conn.execute(
+            result = conn.execution_options(stream_results=True).execute(
                 text(query),
                 {"cutoff": cutoff_str, "limit": self.max_messages},
-            ).mappings().all()
-
-        documents: List[Dict[str, object]] = []
-        for row in rows:
-            content = (row["content"] or "").strip()
-            if not content:
-                continue
-            created_at_value = row["created_at"]
-            if isinstance(created_at_value, datetime):
-                created_at = created_at_value.astimezone(timezone.utc).isoformat()
-            else:
-                created_at = str(created_at_value or "")
-            text = f"[{row['role']}] {content}"
-            snippets = content.splitlines()
-            snippet = snippets[0][:200] if snippets else content[:200]
-            documents.append(
-                {
-                    "message_id": row["id"],
-                    "session_id": row["session_id"],
-                    "role": row["role"],
-                    "created_at": created_at,
-                    "text": text,
-                    "snippet": snippet,
-                }
             )
-        return list(reversed(documents))
-
-
-memory_index = MemoryIndex(
-    db_url=DEFAULT_DB_URL,
-    index_dir=DEFAULT_INDEX_DIR,
-    lookback_days=DEFAULT_LOOKBACK_DAYS,
-    max_messages=DEFAULT_MAX_MESSAGES,
-    embed_model_name=DEFAULT_EMBED_MODEL,
-    refresh_interval_hours=DEFAULT_REFRESH_INTERVAL_HOURS,
-)
+            for message_id, session_id, role, raw_content, created_at_value in result.yield_per(FETCH_BATCH_SIZE):
+                content = (raw_content or "").strip()
+                if not content:
+                    continue
+                if isinstance(created_at_value, datetime):
+                    created_at = created_at_value.astimezone(timezone.utc).isoformat()
+                else:
+                    created_at = str(created_at_value or "")
+                doc_text = f"[{role}] {content}"
+                rows.append(
+                    (
+                        message_id,
+                        session_id,
+                        role,
+                        created_at,
+                        doc_text,
+                        hashlib.sha256(doc_text.encode("utf-8")).hexdigest(),
+                        content[:200].splitlines()[0],
+                    )
+                )
+        return MemoryDocuments.from_rows(rows)
+
+_memory_index: Optional[MemoryIndex] = None
+_memory_index_lock = threading.Lock()
+
+
+def get_memory_index() -> MemoryIndex:
+    """Build the shared index on first use.
+
+    Nothing heavy may run at import time: the encode pool uses the ``spawn`` start method, and every
+    worker re-imports this script as ``__mp_main__``.
+    """
+    global _memory_index
+    with _memory_index_lock:
+        if _memory_index is None:
+            _memory_index = MemoryIndex(
+                db_url=DEFAULT_DB_URL,
+                index_dir=DEFAULT_INDEX_DIR,
+                lookback_days=DEFAULT_LOOKBACK_DAYS,
+                max_messages=DEFAULT_MAX_MESSAGES,
+                embed_model_name=DEFAULT_EMBED_MODEL,
+                refresh_interval_hours=DEFAULT_REFRESH_INTERVAL_HOURS,
+                use_onnx=DEFAULT_USE_ONNX,
+            )
+        return _memory_index
 
 
 @app.tool(name="memory_search")
@@ -265,7 +709,7 @@ def memory_search(query: str, top_k: int = 5, min_score: float = 0.25) -> Dict[s
     """Search historical conversations and notes (vectors + keyword snippets)."""
     try:
         params = MemorySearchSchema(query=query, top_k=top_k, min_score=min_score)
-        results = memory_index.search(params.query, params.top_k, params.min_score)
+        results = get_memory_index().search(params.query, params.top_k, params.min_score)
         return MCPResponse(ok=True, data={"query": params.query, "results": results}).to_dict()
     except ValidationError as exc:
         return MCPResponse(ok=False, error=str(exc)).to_dict()
@@ -277,7 +721,7 @@ def memory_search(query: str, top_k: int = 5, min_score: float = 0.25) -> Dict[s
 def memory_refresh() -> Dict[str, object]:
     """Force rebuild the memory vector index from the latest database contents."""
     try:
-        stats = memory_index.refresh(force=True)
+        stats = get_memory_index().refresh(force=True)
         return MCPResponse(ok=True, data=stats).to_dict()
     except Exception as exc:  # noqa: BLE001
         return MCPResponse(ok=False, error=str(exc)).to_dict()
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import copy
+import functools
 import os
 from dataclasses import dataclass
 from pathlib import Path
@@ -21,6 +23,7 @@ if load_dotenv is not None:
 
 BASE_WORKDIR = Path(os.getenv("PERSONAL_AGENT_WORKDIR", ".")).resolve()
 TEXT_EXTENSIONS: Set[str] = {".txt", ".md", ".markdown"}
+PARSE_CACHE_SIZE = 64
 
 app = FastMCP("file-parser")
 
@@ -67,19 +70,9 @@ def file_parser(path: str, max_sections: Optional[int] = None) -> Dict[str, obje
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        suffix = file_path.suffix.lower()
-        if suffix == ".pptx":
-            payload = _parse_pptx(file_path, params.max_sections)
-        elif suffix == ".pdf":
-            payload = _parse_pdf(file_path, params.max_sections)
-        elif suffix == ".docx":
-            payload = _parse_docx(file_path, params.max_sections)
-        elif suffix in TEXT_EXTENSIONS:
-            payload = _parse_text(file_path, params.max_sections)
-        else:
-            supported = ", ".join(sorted({".pptx", ".pdf", ".docx", *TEXT_EXTENSIONS}))
-            raise ValueError(f"Unsupported file extension '{suffix}'. Supported extensions: {supported}.")
-
+        stat = file_path.stat()
+        # Copy so callers never mutate the cached parse result.
+        payload = copy.deepcopy(_parse_file(str(file_path), stat.st_mtime_ns, stat.st_size, params.max_sections))
         return MCPResponse(ok=True, data={"file": str(file_path), **payload}).to_dict()
     except ValidationError as exc:
         return MCPResponse(ok=False, error=str(exc)).to_dict()
@@ -87,6 +80,23 @@ def file_parser(path: str, max_sections: Optional[int] = None) -> Dict[str, obje
         return MCPResponse(ok=False, error=str(exc)).to_dict()
 
 
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_file(path: str, mtime_ns: int, size: int, max_sections: Optional[int]) -> Dict[str, object]:
+    """Parse a file once per (path, mtime, size, max_sections); edits to the file invalidate the entry."""
+    file_path = Path(path)
+    suffix = file_path.suffix.lower()
+    if suffix == ".pptx":
+        return _parse_pptx(file_path, max_sections)
+    if suffix == ".pdf":
+        return _parse_pdf(file_path, max_sections)
+    if suffix == ".docx":
+        return _parse_docx(file_path, max_sections)
+    if suffix in TEXT_EXTENSIONS:
+        return _parse_text(file_path, max_sections)
+    supported = ", ".join(sorted({".pptx", ".pdf", ".docx", *TEXT_EXTENSIONS}))
+    raise ValueError(f"Unsupported file extension '{suffix}'. Supported extensions: {supported}.")
+
+
 def _parse_pptx(file_path: Path, max_sections: Optional[int]) -> Dict[str, object]:
     try:
         from pptx import Presentation  # type: ignore
@@ -111,10 +121,30 @@ def _parse_pptx(file_path: Path, max_sections: Optional[int]) -> Dict[str, objec
 
 
 def _parse_pdf(file_path: Path, max_sections: Optional[int]) -> Dict[str, object]:
+    try:
+        import fitz  # type: ignore
+    except ImportError:
+        return _parse_pdf_pypdf2(file_path, max_sections)
+
+    document = fitz.open(str(file_path))
+    try:
+        pages = []
+        for idx, page in enumerate(document, start=1):
+            if max_sections is not None and idx > max_sections:
+                break
+            pages.append({"index": idx, "content": page.get_text("text").strip()})
+        return {"type": "pdf", "page_count": len(document), "pages": pages}
+    finally:
+        document.close()
+
+
+def _parse_pdf_pypdf2(file_path: Path, max_sections: Optional[int]) -> Dict[str, object]:
     try:
         from PyPDF2 import PdfReader  # type: ignore
     except ImportError as exc:  # noqa: BLE001
-        raise RuntimeError("Missing dependency 'PyPDF2'. Install it with 'pip install PyPDF2'.") from exc
+        raise RuntimeError(
+            "Missing PDF dependency. Install it with 'pip install pymupdf' (or 'pip install PyPDF2')."
+        ) from exc
 
     reader = PdfReader(str(file_path))
     pages = []
@@ -145,15 +175,16 @@ def _parse_docx(file_path: Path, max_sections: Optional[int]) -> Dict[str, objec
 
 
 def _parse_text(file_path: Path, max_sections: Optional[int]) -> Dict[str, object]:
+    raw = file_path.read_bytes()
     try:
-        content = file_path.read_text(encoding="utf-8")
+        content = raw.decode("utf-8")
     except UnicodeDecodeError:
-        content = file_path.read_text(encoding="utf-8", errors="ignore")
+        content = raw.decode("utf-8", errors="ignore")
 
-    lines = [line.strip() for line in content.splitlines()]
-    if max_sections is not None:
-        lines = lines[:max_sections]
-    return {"type": "text", "lines": lines, "line_count": len(content.splitlines())}
+    all_lines = content.splitlines()
+    selected = all_lines if max_sections is None else all_lines[:max_sections]
+    lines = [line.strip() for line in selected]
+    return {"type": "text", "lines": lines, "line_count": len(all_lines)}
 
 
 if __name__ == "__main__":
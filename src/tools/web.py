@@ -2,24 +2,36 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
 from dataclasses import dataclass
 from typing import Dict, Optional
 
 from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 try:
     from dotenv import load_dotenv
 except ImportError:  # pragma: no cover - optional dependency
     load_dotenv = None
 
+try:
+    from tavily import TavilyClient  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    TavilyClient = None
+
 
 if load_dotenv is not None:
     load_dotenv(override=False)
 
 app = FastMCP("web-search")
 
+SEARCH_DEPTHS = frozenset(("basic", "advanced"))
+MIN_RESULTS = 1
+MAX_RESULTS = 10
+CONTENT_PREVIEW_CHARS = 500
+
 
 @dataclass
 class MCPResponse:
@@ -42,13 +54,25 @@ class TavilyRequest(BaseModel):
         "advanced",
         description="Search depth for Tavily. Supported values: 'basic' or 'advanced'.",
     )
-    max_results: int = Field(5, ge=1, le=10, description="Maximum number of results to return (1-10).")
+    max_results: int = Field(
+        5,
+        ge=MIN_RESULTS,
+        le=MAX_RESULTS,
+        description=f"Maximum number of results to return ({MIN_RESULTS}-{MAX_RESULTS}).",
+    )
     include_answer: bool = Field(True, description="Include Tavily's synthesized answer when available.")
     include_raw_content: bool = Field(False, description="Return full content for each result.")
 
+    @field_validator("search_depth")
+    @classmethod
+    def validate_search_depth(cls, v: str) -> str:
+        if v not in SEARCH_DEPTHS:
+            raise ValueError(f"search_depth must be one of: {', '.join(sorted(SEARCH_DEPTHS))}.")
+        return v
+
 
 @app.tool(name="web_search")
-def web_search(
+async def web_search(
     query: str,
     search_depth: str = "advanced",
     max_results: int = 5,
@@ -71,13 +95,10 @@ def web_search(
         if not api_key:
             raise RuntimeError("Environment variable TAVILY_API_KEY is not set.")
 
-        try:
-            from tavily import TavilyClient  # type: ignore
-        except ImportError as exc:  # noqa: BLE001
-            raise RuntimeError("Missing dependency 'tavily'. Install it with 'pip install tavily'.") from exc
-
-        client = TavilyClient(api_key=api_key)
-        response = client.search(
+        client = _get_tavily_client(api_key)
+        # TavilyClient is blocking; run it in a worker thread so the server loop stays responsive.
+        response = await asyncio.to_thread(
+            client.search,
             query=params.query,
             search_depth=params.search_depth,
             max_results=params.max_results,
@@ -85,18 +106,19 @@ def web_search(
             include_raw_content=params.include_raw_content,
         )
 
+        results = []
+        for item in response.get("results", [])[: params.max_results]:
+            content = item.get("content")
+            if not params.include_raw_content:
+                content = content[:CONTENT_PREVIEW_CHARS] if content else ""
+            results.append({"title": item.get("title"), "url": item.get("url"), "score": item.get("score"), "content": content})
+            # Drop the raw item so long page bodies can be freed before the next result is shaped.
+            item.clear()
+
         data = {
             "query": params.query,
             "search_depth": params.search_depth,
-            "results": [
-                {
-                    "title": item.get("title"),
-                    "url": item.get("url"),
-                    "score": item.get("score"),
-                    "content": item.get("content") if params.include_raw_content else (item.get("content") or "")[:500],
-                }
-                for item in response.get("results", [])[: params.max_results]
-            ],
+            "results": results,
         }
 
         if params.include_answer and response.get("answer"):
@@ -111,6 +133,15 @@ def web_search(
         return MCPResponse(ok=False, error=str(exc)).to_dict()
 
 
+@functools.lru_cache(maxsize=8)
+def _get_tavily_client(api_key: str):
+    """Build one TavilyClient per API key so repeated searches skip client construction."""
+    if TavilyClient is None:
+        raise RuntimeError("Missing dependency 'tavily'. Install it with 'pip install tavily'.")
+
+    return TavilyClient(api_key=api_key)
+
+
 if __name__ == "__main__":
     app.run()
 
@@ -0,0 +1,8 @@
+"""Shared pytest setup: make the ``src`` packages importable the way the agent imports them."""
+
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
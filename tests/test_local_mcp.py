@@ -0,0 +1,277 @@
+"""Tests for the persistent-session MCP client in ``tools.local_mcp``.
+
+The MCP SDK is replaced by a small in-memory fake so the session, loop, timeout and
+reconnect logic can be exercised without spawning real FastMCP services.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import sys
+import types
+from typing import Any, Dict, List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from tools import local_mcp
+from tools.base import ToolExecutionError
+from tools.local_mcp import LocalMCPTool, ServiceDefinition
+
+
+CONNECTION_CLOSED = -32000
+INVALID_PARAMS = -32602
+
+
+class FakeMcpError(Exception):
+    """Stands in for ``mcp.shared.exceptions.McpError`` (a JSON-RPC error reply)."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.error = types.SimpleNamespace(code=code, message=message)
+
+
+class FakeTextContent(BaseModel):
+    type: str = "text"
+    text: str
+
+
+class FakeTool(BaseModel):
+    name: str
+    description: Optional[str] = None
+
+
+class FakeServer:
+    """Records spawns and teardowns and decides how each tool call behaves."""
+
+    def __init__(self) -> None:
+        self.spawned = 0
+        self.closed = 0
+        self.tools = ["echo", "fail_transport", "fail_protocol", "fail_closed", "slow"]
+        self.close_next_list = False
+        self.hang_initialize = False
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]]):
+        if name == "fail_transport":
+            raise ConnectionError("service went away")
+        if name == "fail_protocol":
+            raise FakeMcpError(INVALID_PARAMS, "invalid params")
+        if name == "fail_closed":
+            raise FakeMcpError(CONNECTION_CLOSED, "Connection closed")
+        if name == "slow":
+            await asyncio.sleep(10)
+        result = types.SimpleNamespace(
+            isError=False,
+            content=[FakeTextContent(text=f"{name}:{arguments}")],
+            structuredContent=None,
+        )
+        return result
+
+
+@pytest.fixture
+def fake_server(monkeypatch: pytest.MonkeyPatch) -> FakeServer:
+    server = FakeServer()
+
+    class ClientSession:
+        def __init__(self, read, write) -> None:
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info) -> None:
+            return None
+
+        async def initialize(self) -> None:
+            server.spawned += 1
+            if server.hang_initialize:
+                await asyncio.sleep(10)
+
+        async def list_tools(self):
+            if server.close_next_list:
+                server.close_next_list = False
+                raise FakeMcpError(CONNECTION_CLOSED, "Connection closed")
+            return types.SimpleNamespace(tools=[FakeTool(name=name) for name in server.tools])
+
+        async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+            return await server.call(name, arguments)
+
+    class StdioServerParameters:
+        def __init__(self, command: str, args: List[str], env: Optional[Dict[str, str]] = None) -> None:
+            self.command, self.args, self.env = command, args, env
+
+    @contextlib.asynccontextmanager
+    async def stdio_client(params):
+        try:
+            yield (None, None)
+        finally:
+            server.closed += 1
+
+    mcp_module = types.ModuleType("mcp")
+    mcp_module.ClientSession = ClientSession
+    client_module = types.ModuleType("mcp.client")
+    stdio_module = types.ModuleType("mcp.client.stdio")
+    stdio_module.StdioServerParameters = StdioServerParameters
+    stdio_module.stdio_client = stdio_client
+    stdio_module.get_default_environment = lambda: {"PATH": "/usr/bin"}
+    types_module = types.ModuleType("mcp.types")
+    types_module.ContentBlock = FakeTextContent
+    types_module.CONNECTION_CLOSED = CONNECTION_CLOSED
+    shared_module = types.ModuleType("mcp.shared")
+    exceptions_module = types.ModuleType("mcp.shared.exceptions")
+    exceptions_module.McpError = FakeMcpError
+
+    for name, module in {
+        "mcp": mcp_module,
+        "mcp.client": client_module,
+        "mcp.client.stdio": stdio_module,
+        "mcp.types": types_module,
+        "mcp.shared": shared_module,
+        "mcp.shared.exceptions": exceptions_module,
+    }.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    local_mcp._content_adapter.cache_clear()
+    yield server
+    local_mcp._content_adapter.cache_clear()
+
+
+_service_ids = itertools.count()
+
+
+@pytest.fixture
+def definition() -> ServiceDefinition:
+    # A fresh command per test keeps the module-level client registry from leaking sessions between tests.
+    return ServiceDefinition("fake_service", [sys.executable, f"fake-service-{next(_service_ids)}.py"])
+
+
+@pytest.fixture
+def client(definition: ServiceDefinition):
+    client = local_mcp._get_service_client(definition)
+    yield client
+    client.close()
+
+
+def test_tools_share_one_client_per_service_definition(definition: ServiceDefinition) -> None:
+    first = LocalMCPTool(service_definitions=[definition])
+    second = LocalMCPTool(service_definitions=[ServiceDefinition("other_name", list(definition.command))])
+
+    assert first._service_clients[0] is second._service_clients[0]
+    first._service_clients[0].close()
+
+
+def test_consecutive_calls_reuse_one_service_process(fake_server: FakeServer, client) -> None:
+    assert [tool.name for tool in client.list_tools()] == fake_server.tools
+    client.call_tool_json("echo", {"a": 1})
+    client.call_tool_json("echo", {"a": 2})
+
+    assert fake_server.spawned == 1
+    assert fake_server.closed == 0
+
+
+def test_tool_instances_reuse_the_shared_service_process(fake_server: FakeServer, definition, client) -> None:
+    for _ in range(3):
+        tool = LocalMCPTool(service_definitions=[definition])
+        tool.list_available_tools()
+        tool._run("echo", {"n": 1})
+
+    assert fake_server.spawned == 1
+
+
+def test_transport_failure_respawns_on_next_call(fake_server: FakeServer, client) -> None:
+    client.call_tool_json("echo", {})
+    with pytest.raises(ConnectionError):
+        client.call_tool_json("fail_transport", {})
+    assert fake_server.closed == 1
+
+    client.call_tool_json("echo", {})
+    assert fake_server.spawned == 2
+
+
+def test_protocol_error_keeps_the_session(fake_server: FakeServer, client) -> None:
+    client.call_tool_json("echo", {})
+    with pytest.raises(FakeMcpError):
+        client.call_tool_json("fail_protocol", {})
+    client.call_tool_json("echo", {})
+
+    assert fake_server.spawned == 1
+    assert fake_server.closed == 0
+
+
+def test_connection_closed_error_respawns_on_next_call(fake_server: FakeServer, client) -> None:
+    client.call_tool_json("echo", {})
+    with pytest.raises(FakeMcpError):
+        client.call_tool_json("fail_closed", {})
+    assert fake_server.closed == 1
+
+    client.call_tool_json("echo", {})
+    assert fake_server.spawned == 2
+
+
+def test_list_tools_reconnects_after_connection_closed(fake_server: FakeServer, client) -> None:
+    fake_server.close_next_list = True
+
+    assert [tool.name for tool in client.list_tools()] == fake_server.tools
+    assert fake_server.spawned == 2
+    assert fake_server.closed == 1
+
+
+def test_timeout_raises_tool_error_and_keeps_the_session(
+    fake_server: FakeServer, client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(local_mcp, "CALL_TIMEOUT_SECONDS", 0.05)
+    with pytest.raises(ToolExecutionError, match="timed out"):
+        client.call_tool_json("slow", {})
+    client.call_tool_json("echo", {})
+
+    assert fake_server.spawned == 1
+
+
+def test_hung_startup_times_out_and_is_dropped(
+    fake_server: FakeServer, client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(local_mcp, "CALL_TIMEOUT_SECONDS", 0.05)
+    fake_server.hang_initialize = True
+    with pytest.raises(ToolExecutionError, match="did not start"):
+        client.call_tool_json("echo", {})
+    assert fake_server.closed == 1
+
+    fake_server.hang_initialize = False
+    client.call_tool_json("echo", {})
+    assert fake_server.spawned == 2
+
+
+def test_close_stops_the_service(fake_server: FakeServer, client) -> None:
+    client.call_tool_json("echo", {})
+    client.close()
+    assert fake_server.closed == 1
+
+    client.call_tool_json("echo", {})
+    assert fake_server.spawned == 2
+
+
+def test_concurrent_async_calls_share_the_session(fake_server: FakeServer, definition, client) -> None:
+    tool = LocalMCPTool(service_definitions=[definition])
+    tool.list_available_tools()
+
+    async def run_all() -> List[str]:
+        return await asyncio.gather(*(tool._arun("echo", {"i": i}) for i in range(5)))
+
+    results = asyncio.run(run_all())
+
+    assert len(results) == 5
+    assert fake_server.spawned == 1
+
+
+def test_refresh_publishes_a_complete_tool_map(fake_server: FakeServer, definition, client) -> None:
+    tool = LocalMCPTool(service_definitions=[definition])
+    tool.list_available_tools()
+    previous_map = tool._tool_map
+
+    tool._refresh_tool_map(force_refresh=True)
+
+    # The old map is replaced, not cleared in place, so a concurrent reader keeps a consistent view.
+    assert previous_map == tool._tool_map
+    assert previous_map is not tool._tool_map
+    assert set(tool._tool_map) == set(fake_server.tools)
@@ -0,0 +1,267 @@
+"""Tests for index persistence and refresh in ``tools.memory``.
+
+The sentence encoder and FAISS are replaced by small in-memory fakes, and the message
+database is a throwaway SQLite file, so generations, incremental re-embedding, cache
+invalidation and refresh backoff can be exercised without models or a MySQL server.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import logging
+import sqlite3
+import sys
+import time
+import types
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("mcp.server.fastmcp")
+
+DIM = 4
+
+
+class FakeIndex:
+    """Exact inner-product index standing in for ``faiss.IndexFlatIP`` / ``IndexHNSWSQ``."""
+
+    def __init__(self, dim: int, *args) -> None:
+        self.dim = dim
+        self.vectors = np.zeros((0, dim), dtype="float32")
+
+    @property
+    def ntotal(self) -> int:
+        return len(self.vectors)
+
+    def train(self, vectors) -> None:
+        pass
+
+    def add(self, vectors) -> None:
+        self.vectors = np.concatenate([self.vectors, np.asarray(vectors, dtype="float32")])
+
+    def search(self, queries, k: int):
+        scores = queries @ self.vectors.T
+        order = np.argsort(-scores, axis=1)[:, :k]
+        top = np.take_along_axis(scores, order, axis=1)
+        if order.shape[1] < k:
+            pad = k - order.shape[1]
+            order = np.pad(order, ((0, 0), (0, pad)), constant_values=-1)
+            top = np.pad(top, ((0, 0), (0, pad)), constant_values=-1.0)
+        return top, order
+
+
+def _write_index(index: FakeIndex, path: str) -> None:
+    with open(path, "wb") as fh:
+        np.save(fh, index.vectors)
+
+
+def _read_index(path: str, flags: int = 0) -> FakeIndex:
+    vectors = np.load(path)
+    index = FakeIndex(vectors.shape[1])
+    index.vectors = vectors
+    return index
+
+
+class FakeSentenceTransformer:
+    """Deterministic encoder that records every text it is asked to embed."""
+
+    encoded: List[str] = []
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIM
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, normalize_embeddings=False):
+        FakeSentenceTransformer.encoded.extend(texts)
+        rows = []
+        for text in texts:
+            # Case-insensitive, so "Hello" and "hello" are different cache keys with identical vectors.
+            digest = hashlib.sha256(text.strip().lower().encode("utf-8")).digest()
+            vector = np.frombuffer(digest[: DIM * 4], dtype=np.uint32).astype("float32") + 1.0
+            rows.append(vector / np.linalg.norm(vector))
+        return np.stack(rows)
+
+
+@pytest.fixture(scope="module")
+def memory():
+    fake_faiss = types.ModuleType("faiss")
+    fake_faiss.Index = FakeIndex
+    fake_faiss.IndexFlatIP = FakeIndex
+    fake_faiss.IndexHNSWSQ = FakeIndex
+    fake_faiss.ScalarQuantizer = types.SimpleNamespace(QT_fp16=1)
+    fake_faiss.METRIC_INNER_PRODUCT = 0
+    fake_faiss.IO_FLAG_MMAP = 1
+    fake_faiss.IO_FLAG_READ_ONLY = 2
+    fake_faiss.omp_set_num_threads = lambda n: None
+    fake_faiss.write_index = _write_index
+    fake_faiss.read_index = _read_index
+    fake_torch = types.ModuleType("torch")
+    fake_torch.set_num_threads = lambda n: None
+    fake_torch.set_num_interop_threads = lambda n: None
+    fake_sentence_transformers = types.ModuleType("sentence_transformers")
+    fake_sentence_transformers.SentenceTransformer = FakeSentenceTransformer
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "faiss", fake_faiss)
+        mp.setitem(sys.modules, "torch", fake_torch)
+        mp.setitem(sys.modules, "sentence_transformers", fake_sentence_transformers)
+        mp.delitem(sys.modules, "tools.memory", raising=False)
+        yield importlib.import_module("tools.memory")
+        sys.modules.pop("tools.memory", None)
+
+
+@pytest.fixture
+def messages_db(tmp_path: Path) -> Path:
+    path = tmp_path / "messages.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE messages (id INTEGER PRIMARY KEY, session_id INTEGER, role TEXT, "
+            "content TEXT, created_at TEXT)"
+        )
+    add_message(path, 1, "hello")
+    add_message(path, 2, "world")
+    return path
+
+
+def add_message(db: Path, message_id: int, content: str) -> None:
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO messages VALUES (?, 1, 'user', ?, ?)", (message_id, content, created_at)
+        )
+
+
+@pytest.fixture
+def make_index(memory, messages_db: Path, tmp_path: Path):
+    created = []
+
+    def make():
+        index = memory.MemoryIndex(
+            db_url=f"sqlite:///{messages_db}",
+            index_dir=tmp_path / "index",
+            lookback_days=30,
+            max_messages=100,
+            embed_model_name="fake-model",
+            refresh_interval_hours=1.0,
+        )
+        created.append(index)
+        return index
+
+    FakeSentenceTransformer.encoded = []
+    yield make
+    for index in created:
+        index._refresh_executor.shutdown(wait=True)
+
+
+def stored_generation(index) -> str:
+    with sqlite3.connect(index.metadata_file) as conn:
+        return conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+
+def test_interrupted_persist_keeps_previous_generation(make_index, messages_db: Path, monkeypatch) -> None:
+    index = make_index()
+    generation = stored_generation(index)
+
+    def crash():
+        raise RuntimeError("killed before the SQLite commit")
+
+    add_message(messages_db, 3, "again")
+    monkeypatch.setattr(index, "_connect_metadata", crash)
+    with pytest.raises(RuntimeError):
+        index.refresh(force=True)
+
+    reloaded = make_index()
+    assert stored_generation(reloaded) == generation
+    assert len(reloaded._documents) == 2
+    assert reloaded._index.ntotal == 2
+
+
+def test_persist_keeps_only_current_generation_files(make_index) -> None:
+    index = make_index()
+    index.refresh(force=True)
+    index.refresh(force=True)
+
+    generation = stored_generation(index)
+    assert sorted(path.name for path in index.index_dir.glob("*.faiss")) == [f"memory.{generation}.faiss"]
+    assert sorted(path.name for path in index.index_dir.glob("*.npy")) == [f"memory_embeddings.{generation}.npy"]
+
+
+def test_unchanged_messages_reuse_embeddings(make_index, messages_db: Path) -> None:
+    index = make_index()
+    assert FakeSentenceTransformer.encoded == ["[user] hello", "[user] world"]
+
+    add_message(messages_db, 2, "world, edited")
+    add_message(messages_db, 3, "new")
+    FakeSentenceTransformer.encoded = []
+    index.refresh(force=False)
+    assert FakeSentenceTransformer.encoded == ["[user] world, edited", "[user] new"]
+
+    # The reused rows also come from the persisted embeddings file after a restart.
+    add_message(messages_db, 4, "after restart")
+    reloaded = make_index()
+    FakeSentenceTransformer.encoded = []
+    reloaded.refresh(force=False)
+    assert FakeSentenceTransformer.encoded == ["[user] after restart"]
+    assert len(reloaded._documents) == 4
+
+
+def test_rebuild_clears_exact_and_semantic_query_caches(make_index, messages_db: Path) -> None:
+    index = make_index()
+    assert len(index.search("hello", top_k=10, min_score=0.0)) == 2
+    # Same vector under a different key is answered by the semantic cache.
+    assert len(index.search("Hello", top_k=10, min_score=0.0)) == 2
+
+    add_message(messages_db, 3, "again")
+    index.refresh(force=True)
+
+    assert len(index.search("hello", top_k=10, min_score=0.0)) == 3
+    assert len(index.search("HELLO", top_k=10, min_score=0.0)) == 3
+
+
+def test_failed_refresh_waits_out_backoff(make_index, monkeypatch, caplog) -> None:
+    index = make_index()
+    attempts = []
+
+    def failing_fetch():
+        attempts.append(1)
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(index, "_fetch_documents", failing_fetch)
+    index._built_at = datetime.now(timezone.utc) - 2 * index.refresh_interval
+
+    with caplog.at_level(logging.ERROR, logger="memory-service"):
+        assert len(index.search("hello", top_k=10, min_score=0.0)) == 2
+        deadline = time.monotonic() + 5
+        while index._refresh_retry_at is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert attempts == [1]
+    assert index._refresh_retry_at is not None
+    assert "refresh failed" in caplog.text
+
+    index.search("world", top_k=10, min_score=0.0)
+    index._refresh_future.exception()
+    assert attempts == [1]
+
+    index._refresh_retry_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    index.search("again", top_k=10, min_score=0.0)
+    index._refresh_future.exception()
+    assert attempts == [1, 1]
+
+
+def test_load_failure_is_logged_before_rebuild(make_index, caplog) -> None:
+    index = make_index()
+    for path in index.index_dir.glob("*.faiss"):
+        path.unlink()
+
+    with caplog.at_level(logging.WARNING, logger="memory-service"):
+        rebuilt = make_index()
+
+    assert "Could not load the persisted memory index" in caplog.text
+    assert len(rebuilt._documents) == 2